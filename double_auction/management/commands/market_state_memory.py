@@ -0,0 +1,49 @@
+import gc
+import tracemalloc
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from double_auction.models import Bid
+from double_auction.market_state import BidRecord, price_to_ticks
+
+
+def measure(build, num_orders):
+    """Returns the number of bytes allocated by build() per order."""
+    gc.collect()
+    tracemalloc.start()
+    objects = build(num_orders)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return allocated / num_orders
+
+
+def build_models(num_orders):
+    now = timezone.now()
+    return [Bid(id=i, player_id=i % 100, price=Decimal('{}.{:02d}'.format(i % 10, i % 100)), quantity=1,
+                active=True, created_at=now, updated_at=now)
+            for i in range(num_orders)]
+
+
+def build_records(num_orders):
+    now = timezone.now()
+    return [BidRecord(i, i % 100, price_to_ticks('{}.{:02d}'.format(i % 10, i % 100)), 1, True, now)
+            for i in range(num_orders)]
+
+
+class Command(BaseCommand):
+    help = 'Reports memory used per resting order by ORM instances and by market_state records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        num_orders = options['orders']
+        orm_bytes = measure(build_models, num_orders)
+        record_bytes = measure(build_records, num_orders)
+        self.stdout.write('Resting orders: {}'.format(num_orders))
+        self.stdout.write('Bid model instance: {:.0f} bytes per order'.format(orm_bytes))
+        self.stdout.write('BidRecord: {:.0f} bytes per order'.format(record_bytes))
+        self.stdout.write('Ratio: {:.1f}x'.format(orm_bytes / record_bytes))
@@ -0,0 +1,221 @@
+"""
+Lightweight in-process mirrors of the market models.
+
+Records keep only the fields that matching and rendering need and use __slots__,
+so holding every resting order of many groups in memory costs a fraction of
+the corresponding Django model instances. Prices are stored as integer ticks
+(hundredths for Constants.price_digits = 2) to avoid Decimal objects.
+
+Records are loaded straight from value rows (no model instances are created)
+and are written back to their rows with Record.save() at persistence time.
+"""
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import Constants, Bid, Ask, Slot, Item, Contract
+
+TICKS_PER_UNIT = 10 ** Constants.price_digits
+
+
+def price_to_ticks(price):
+    return int(round(Decimal(str(price)) * TICKS_PER_UNIT))
+
+
+def ticks_to_price(ticks):
+    return Decimal(ticks) / TICKS_PER_UNIT
+
+
+class Record:
+    __slots__ = ()
+    # model the record mirrors
+    model = None
+    # names of the model fields (in the order of __slots__) used to build records from value rows
+    row_fields = ()
+
+    @classmethod
+    def from_rows(cls, queryset):
+        return [cls.from_row(row) for row in queryset.values_list(*cls.row_fields)]
+
+    @classmethod
+    def first_from_rows(cls, queryset):
+        """Builds a record from the first row of an ordered queryset, fetching only that row."""
+        row = queryset.values_list(*cls.row_fields).first()
+        if row is not None:
+            return cls.from_row(row)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row)
+
+    def save(self):
+        """Writes the fields the record owns back to its (already existing) row.
+
+        A queryset update is used instead of Model.save(), so fields the record does not keep
+        (like created_at) are left untouched and pre_save/post_save handlers are not triggered.
+        Subclasses define get_update_fields() returning the fields they own.
+        """
+        self.model.objects.filter(pk=self.id).update(updated_at=timezone.now(), **self.get_update_fields())
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__,
+                               ', '.join('{}={!r}'.format(f, getattr(self, f)) for f in self.__slots__))
+
+
+class StatementRecord(Record):
+    """A bid or an ask."""
+    __slots__ = ('id', 'player_id', 'ticks', 'quantity', 'active', 'created_at')
+    row_fields = ('id', 'player_id', 'price', 'quantity', 'active', 'created_at')
+
+    def __init__(self, id, player_id, ticks, quantity, active, created_at):
+        self.id = id
+        self.player_id = player_id
+        self.ticks = ticks
+        self.quantity = quantity
+        self.active = active
+        self.created_at = created_at
+
+    @classmethod
+    def from_row(cls, row):
+        id, player_id, price, quantity, active, created_at = row
+        return cls(id, player_id, price_to_ticks(price), quantity, active, created_at)
+
+    @classmethod
+    def from_model(cls, statement):
+        return cls(statement.id, statement.player_id, price_to_ticks(statement.price),
+                   statement.quantity, statement.active, statement.created_at)
+
+    @property
+    def price(self):
+        return ticks_to_price(self.ticks)
+
+    def get_update_fields(self):
+        return {'price': self.price, 'quantity': self.quantity, 'active': self.active}
+
+    def as_dict(self):
+        return {'price': str(self.price),
+                'quantity': self.quantity}
+
+
+class BidRecord(StatementRecord):
+    __slots__ = ()
+    model = Bid
+
+
+class AskRecord(StatementRecord):
+    __slots__ = ()
+    model = Ask
+
+
+class SlotRecord(Record):
+    """A slot together with the item stored in it (if any).
+
+    Items change slots only through move_item_to(), and only the record an item was moved into
+    writes the item's slot back, so a stale record of the old slot cannot pull the item back.
+    """
+    __slots__ = ('id', 'owner_id', 'cost', 'value', 'item_id', 'quantity', 'item_moved')
+    model = Slot
+    row_fields = ('id', 'owner_id', 'cost', 'value', 'item__id', 'item__quantity')
+
+    def __init__(self, id, owner_id, cost, value, item_id=None, quantity=None, item_moved=False):
+        self.id = id
+        self.owner_id = owner_id
+        self.cost = cost
+        self.value = value
+        self.item_id = item_id
+        self.quantity = quantity
+        self.item_moved = item_moved
+
+    @classmethod
+    def from_model(cls, slot):
+        try:
+            item = slot.item
+        except Item.DoesNotExist:
+            return cls(slot.id, slot.owner_id, slot.cost, slot.value)
+        return cls(slot.id, slot.owner_id, slot.cost, slot.value, item.id, item.quantity)
+
+    def is_full(self):
+        return self.item_id is not None
+
+    def move_item_to(self, other):
+        if not self.is_full():
+            raise ValueError('Slot {} has no item to move'.format(self.id))
+        if other.is_full():
+            raise ValueError('Slot {} already holds an item'.format(other.id))
+        other.item_id, other.quantity, other.item_moved = self.item_id, self.quantity, True
+        self.item_id = self.quantity = None
+        self.item_moved = False
+
+    def get_update_fields(self):
+        return {'cost': self.cost, 'value': self.value}
+
+    def save(self):
+        super().save()
+        if not self.is_full():
+            return
+        items = Item.objects.filter(pk=self.item_id)
+        if not self.item_moved:
+            # only the quantity is ours to write if the item has since left this slot
+            items = items.filter(slot_id=self.id)
+        items.update(slot_id=self.id, quantity=self.quantity, updated_at=timezone.now())
+        self.item_moved = False
+
+
+class ContractRecord(Record):
+    __slots__ = ('id', 'item_id', 'bid_id', 'ask_id', 'ticks', 'cost', 'value', 'created_at')
+    model = Contract
+    row_fields = ('id', 'item_id', 'bid_id', 'ask_id', 'price', 'cost', 'value', 'created_at')
+
+    def __init__(self, id, item_id, bid_id, ask_id, ticks, cost, value, created_at):
+        self.id = id
+        self.item_id = item_id
+        self.bid_id = bid_id
+        self.ask_id = ask_id
+        self.ticks = ticks
+        self.cost = cost
+        self.value = value
+        self.created_at = created_at
+
+    @classmethod
+    def from_row(cls, row):
+        id, item_id, bid_id, ask_id, price, cost, value, created_at = row
+        return cls(id, item_id, bid_id, ask_id, price_to_ticks(price), cost, value, created_at)
+
+    @classmethod
+    def from_model(cls, contract):
+        return cls(contract.id, contract.item_id, contract.bid_id, contract.ask_id, price_to_ticks(contract.price),
+                   contract.cost, contract.value, contract.created_at)
+
+    @property
+    def price(self):
+        return ticks_to_price(self.ticks)
+
+    def get_update_fields(self):
+        return {'item_id': self.item_id, 'bid_id': self.bid_id, 'ask_id': self.ask_id, 'price': self.price,
+                'cost': self.cost, 'value': self.value}
+
+
+class GroupMarketState:
+    """Resting orders and slots of a single group, loaded with one query per record type."""
+    __slots__ = ('group_id', 'bids', 'asks', 'slots')
+
+    def __init__(self, group_id, bids, asks, slots):
+        self.group_id = group_id
+        self.bids = bids
+        self.asks = asks
+        self.slots = slots
+
+    @classmethod
+    def load(cls, group):
+        return cls(group.pk,
+                   BidRecord.from_rows(Bid.active_statements.filter(player__group=group)),
+                   AskRecord.from_rows(Ask.active_statements.filter(player__group=group)),
+                   SlotRecord.from_rows(Slot.objects.filter(owner__group=group)))
+
+    def best_bid(self):
+        if self.bids:
+            return max(self.bids, key=lambda b: b.ticks)
+
+    def best_ask(self):
+        if self.asks:
+            return min(self.asks, key=lambda a: a.ticks)
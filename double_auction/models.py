@@ -5,7 +5,9 @@ from otree.api import (
 import random
 import json
 from django.db import models as djmodels
-from django.db.models import F, Q, Sum, ExpressionWrapper
+from django.db.models import F, Q, Sum, Max, Min, Count, Case, When, ExpressionWrapper
+from django.utils import timezone
+from datetime import timedelta
 from django.db.models.signals import post_save, pre_save
 
 from django.utils.safestring import mark_safe
@@ -28,7 +30,7 @@ class Constants(BaseConstants):
     name_in_url = 'double_auction'
     players_per_group = None
 
-    num_rounds = 1
+    num_rounds = 3
     units_per_seller = 4
     units_per_buyer = 4
     time_per_round = 300
@@ -39,6 +41,8 @@ class Constants(BaseConstants):
     seller_cost_range = (1, 10)
     buyer_value_range = (1, 10)
     endowment_range = (10, 50)
+    # window (in seconds) over which the monitor computes the rate of recently placed statements
+    monitor_rate_window = 60
 
 
 class Subsession(BaseSubsession):
@@ -50,6 +54,99 @@ class Subsession(BaseSubsession):
         self.num_sellers = self.session.config.get('sellers')
         if self.session.num_participants % (self.num_buyers + self.num_sellers) != 0:
             raise Exception('Number of participants is not divisible by number of sellers and buyers')
+        if self.round_number == 1:
+            self.generate_schedules()
+
+    def planned_role(self, participant):
+        # roles are fixed by position in session, so schedules can be generated before groups are formed
+        group_size = self.num_sellers + self.num_buyers
+        if (participant.id_in_session - 1) % group_size < self.num_sellers:
+            return 'seller'
+        return 'buyer'
+
+    def generate_schedules(self):
+        """Pregenerates slots, items and endowments for all rounds in one bulk pass.
+
+        A round is activated just by players moving to it: its slots already exist,
+        so nobody waits for row-by-row generation between rounds.
+        """
+        c = Constants
+        slots = []
+        for subsession in self.in_rounds(1, c.num_rounds):
+            for p in subsession.get_players():
+                if self.planned_role(p.participant) == 'seller':
+                    # sellers' slots are filled with items and have pregenerated costs
+                    slots.extend(Slot(owner=p, cost=random.randint(*c.seller_cost_range))
+                                 for _ in range(c.units_per_seller))
+                else:
+                    # buyers' slots are initially empty
+                    p.endowment = random.randrange(*c.endowment_range)
+                    slots.extend(Slot(owner=p, value=random.randint(*c.buyer_value_range))
+                                 for _ in range(c.units_per_buyer))
+        Slot.objects.bulk_create(slots)
+        # bulk_create does not return primary keys on every backend, so seller slots are fetched back
+        seller_slots = Slot.objects.filter(owner__session=self.session, cost__isnull=False)
+        Item.objects.bulk_create(Item(slot=slot, quantity=c.initial_quantity) for slot in seller_slots)
+
+    def get_market_stats(self):
+        """Aggregated market stats for all groups of the subsession.
+
+        Uses a fixed number of grouped queries regardless of the number of groups,
+        so the monitor can poll it without running per-group ORM loops.
+
+        stored_statements_per_minute counts bids and asks placed within the rate window that are
+        still stored; retracted statements are deleted and so are not included.
+        """
+        since = timezone.now() - timedelta(seconds=Constants.monitor_rate_window)
+        stats = {g['id']: {'group': g['id_in_subsession'],
+                           'active': g['active'],
+                           'active_sellers': 0,
+                           'active_buyers': 0,
+                           'num_bids': 0,
+                           'num_asks': 0,
+                           'best_bid': None,
+                           'best_ask': None,
+                           'trades': 0,
+                           'volume': 0,
+                           'stored_statements_per_minute': 0,
+                           }
+                 for g in Group.objects.filter(subsession=self).order_by('id_in_subsession').values(
+                     'id', 'id_in_subsession', 'active')}
+
+        # the empty order_by() drops default model ordering, which would otherwise be added to GROUP BY
+        players = Player.objects.filter(subsession=self, active=True).order_by().values('group_id').annotate(
+            sellers=Count(Case(When(id_in_group__lte=self.num_sellers, then=1))),
+            buyers=Count(Case(When(id_in_group__gt=self.num_sellers, then=1))),
+        )
+        for row in players:
+            stats[row['group_id']].update(active_sellers=row['sellers'], active_buyers=row['buyers'])
+
+        for model, side in ((Bid, 'bid'), (Ask, 'ask')):
+            is_active = Q(active=True, player__active=True)
+            best_price = Max if side == 'bid' else Min
+            rows = model.objects.filter(player__subsession=self).order_by().values('player__group_id').annotate(
+                num=Count(Case(When(is_active, then=1))),
+                best=best_price(Case(When(is_active, then='price'))),
+                recent=Count(Case(When(created_at__gte=since, then=1))),
+            )
+            for row in rows:
+                group_stats = stats[row['player__group_id']]
+                group_stats['num_{}s'.format(side)] = row['num']
+                group_stats['best_{}'.format(side)] = row['best']
+                group_stats['stored_statements_per_minute'] += row['recent']
+
+        contracts = Contract.objects.filter(bid__player__subsession=self).order_by().values(
+            'bid__player__group_id').annotate(
+            trades=Count('id'),
+            volume=Sum('item__quantity'),
+        )
+        for row in contracts:
+            stats[row['bid__player__group_id']].update(trades=row['trades'], volume=row['volume'] or 0)
+
+        per_minute = 60 / Constants.monitor_rate_window
+        for group_stats in stats.values():
+            group_stats['stored_statements_per_minute'] *= per_minute
+        return list(stats.values())
 
 
 class Group(BaseGroup):
@@ -76,10 +173,14 @@ class Group(BaseGroup):
     def get_asks(self):
         return Ask.active_statements.filter(player__group=self).order_by('-created_at')
 
+    def get_top_of_book(self):
+        # imported here because market_state itself depends on the models of this module
+        from .market_state import BidRecord, AskRecord
+        return {'best_ask': AskRecord.first_from_rows(self.get_asks().order_by('price')),
+                'best_bid': BidRecord.first_from_rows(self.get_bids().order_by('-price'))}
+
     def get_spread_html(self):
-        return mark_safe(render_to_string('double_auction/includes/spread_to_render.html', {
-            'group': self,
-        }))
+        return mark_safe(render_to_string('double_auction/includes/spread_to_render.html', self.get_top_of_book()))
 
     def no_buyers_left(self) -> bool:
         return not any([p.active for p in self.get_buyers()])
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.conf.urls import url
+from django.contrib.auth.decorators import login_required
+from double_auction.views import SessionMonitor, SessionMonitorData
+
+
+def monitor_url(view_class):
+    view = view_class.as_view()
+    # the monitor exposes live market data, so it is protected just like the oTree admin pages
+    if settings.AUTH_LEVEL:
+        view = login_required(view)
+    return url(view_class.url_pattern, view, name=view_class.url_name)
+
+
+urlpatterns = [
+    monitor_url(SessionMonitor),
+    monitor_url(SessionMonitorData),
+]
@@ -1,33 +1,27 @@
 from otree.api import Currency as c, currency_range
 from ._builtin import Page, WaitPage
-from .models import Constants, Item
-import random
+from .models import Constants
 
 
 class IntroWp(WaitPage):
     group_by_arrival_time = True
 
+    def is_displayed(self):
+        # groups formed by arrival in the first round are kept for the rest of the session
+        return self.round_number == 1
+
     def get_players_for_group(self, waiting_players):
-        if len(waiting_players) >= self.subsession.num_sellers + self.subsession.num_buyers:
-            return waiting_players
+        sellers = [p for p in waiting_players if self.subsession.planned_role(p.participant) == 'seller']
+        buyers = [p for p in waiting_players if self.subsession.planned_role(p.participant) == 'buyer']
+        if len(sellers) >= self.subsession.num_sellers and len(buyers) >= self.subsession.num_buyers:
+            # sellers go first so that roles derived from id_in_group match the pregenerated schedules
+            return sellers[:self.subsession.num_sellers] + buyers[:self.subsession.num_buyers]
 
 
-class GeneratingInitialsWP(WaitPage):
-    def after_all_players_arrive(self):
-        c = Constants
-        g = self.group
-        for s in g.get_sellers():
-            # we create slots for both sellers and buyers, but for sellers we fill them with items
-            # and also pregenerate costs. For buyers they are initially empty
-            for i in range(c.units_per_seller):
-                slot = s.slots.create(cost=random.randint(*c.seller_cost_range))
-                item = Item(slot=slot, quantity=Constants.initial_quantity)
-                item.save()
-
-        for b in g.get_buyers():
-            for i in range(Constants.units_per_buyer):
-                b.endowment = random.randrange(*c.endowment_range)
-                b.slots.create(value=random.randint(*c.buyer_value_range))
+class RoundStartWP(WaitPage):
+    # schedules are pregenerated, so this page only makes every round of a group start together
+    def is_displayed(self):
+        return self.round_number > 1
 
 
 class Market(Page):
@@ -42,6 +36,7 @@ class Market(Page):
         c['bids'] = self.group.get_bids()
         c['repository'] = self.player.get_repo_context()
         c['contracts'] = self.player.get_contracts_queryset()
+        c.update(self.group.get_top_of_book())
 
         return c
 
@@ -57,7 +52,7 @@ class Results(Page):
 
 page_sequence = [
     IntroWp,
-    GeneratingInitialsWP,
+    RoundStartWP,
     Market,
     # ResultsWaitPage,
     # Results
@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from otree.session import create_session
+
+from .models import Subsession, Bid, Ask, Slot, Item, Contract
+from .market_state import BidRecord, AskRecord, SlotRecord, ContractRecord, GroupMarketState
+
+
+class MarketStateTest(TestCase):
+    def setUp(self):
+        session = create_session('double_auction', num_participants=3)
+        self.group = Subsession.objects.get(session=session, round_number=1).get_groups()[0]
+        self.seller = self.group.get_sellers()[0]
+        self.buyer = self.group.get_buyers()[0]
+        # prices do not cross, so no contract is created
+        self.bid = self.buyer.bids.create(price='1.25', quantity=1)
+        self.ask = self.seller.asks.create(price='9.50', quantity=1)
+
+    def test_statement_round_trip(self):
+        for record_class, statement in ((BidRecord, self.bid), (AskRecord, self.ask)):
+            record, = record_class.from_rows(record_class.model.objects.filter(pk=statement.pk))
+            self.assertEqual(record.price, statement.price)
+            self.assertEqual(record.player_id, statement.player_id)
+            record.ticks += 1
+            record.active = False
+            record.save()
+            statement.refresh_from_db()
+            self.assertEqual(statement.price, record.price)
+            self.assertFalse(statement.active)
+            self.assertIsNotNone(statement.created_at)
+
+    def test_slot_round_trip(self):
+        slot = self.seller.get_full_slots().first()
+        record, = SlotRecord.from_rows(Slot.objects.filter(pk=slot.pk))
+        self.assertTrue(record.is_full())
+        record.cost += 1
+        record.quantity = 2
+        record.save()
+        slot.refresh_from_db()
+        self.assertEqual(slot.cost, record.cost)
+        self.assertEqual(Item.objects.get(pk=record.item_id).quantity, 2)
+        self.assertIsNotNone(slot.created_at)
+
+    def test_slot_item_move(self):
+        source_slot = self.seller.get_full_slots().first()
+        target_slot = self.buyer.get_free_slot()
+        source, = SlotRecord.from_rows(Slot.objects.filter(pk=source_slot.pk))
+        stale_source, = SlotRecord.from_rows(Slot.objects.filter(pk=source_slot.pk))
+        target, = SlotRecord.from_rows(Slot.objects.filter(pk=target_slot.pk))
+        item_id = source.item_id
+
+        source.move_item_to(target)
+        target.save()
+        source.save()
+        # a stale record still carrying the item must not move it back
+        stale_source.save()
+
+        self.assertEqual(Item.objects.get(pk=item_id).slot_id, target_slot.pk)
+        self.assertFalse(Item.objects.filter(slot_id=source_slot.pk).exists())
+        with self.assertRaises(ValueError):
+            source.move_item_to(target)
+
+    def test_contract_round_trip(self):
+        item = self.seller.item_to_sell()
+        contract = Contract.objects.create(item=item, bid=self.bid, ask=self.ask, price=Decimal('5.00'),
+                                           cost=item.slot.cost, value=1)
+        record, = ContractRecord.from_rows(Contract.objects.filter(pk=contract.pk))
+        self.assertEqual(record.price, contract.price)
+        record.ticks = 600
+        record.save()
+        contract.refresh_from_db()
+        self.assertEqual(contract.price, Decimal('6.00'))
+
+    def test_group_state(self):
+        state = GroupMarketState.load(self.group)
+        self.assertEqual(state.best_bid().id, self.bid.pk)
+        self.assertEqual(state.best_ask().id, self.ask.pk)
+        self.assertEqual(len(state.slots), Slot.objects.filter(owner__group=self.group).count())
+
+    def test_top_of_book(self):
+        self.buyer.bids.create(price='2.00', quantity=1)
+        top = self.group.get_top_of_book()
+        self.assertIsInstance(top['best_bid'], BidRecord)
+        self.assertEqual(top['best_bid'].price, Decimal('2.00'))
+        self.assertEqual(top['best_ask'].id, self.ask.pk)
@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from otree.session import create_session
+
+from .models import Constants, Subsession
+
+
+class MarketStatsTest(TestCase):
+    def setUp(self):
+        self.session = create_session('double_auction', num_participants=4,
+                                      modified_session_config_fields={'sellers': 2, 'buyers': 2})
+        self.subsession = Subsession.objects.get(session=self.session, round_number=1)
+
+    def test_counts_active_players_per_group(self):
+        group = self.subsession.get_groups()[0]
+        buyer = group.get_buyers()[0]
+        buyer.active = False
+        buyer.save()
+
+        stats = self.subsession.get_market_stats()
+
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['active_sellers'], 2)
+        self.assertEqual(stats[0]['active_buyers'], 1)
+
+    def test_invalid_round_is_not_found(self):
+        response = self.client.get('/double_auction/monitor/{}/data/?round=abc'.format(self.session.code))
+        self.assertEqual(response.status_code, 404)
+
+
+class MarketStatsStatementsTest(TestCase):
+    def setUp(self):
+        self.session = create_session('double_auction', num_participants=3)
+        self.subsession = Subsession.objects.get(session=self.session, round_number=1)
+        group = self.subsession.get_groups()[0]
+        seller = group.get_sellers()[0]
+        buyer1, buyer2 = group.get_buyers()
+        # crossing statements: a contract is made and both statements become passive
+        buyer1.bids.create(price='9.00', quantity=1)
+        seller.asks.create(price='5.00', quantity=1)
+        # non-crossing statements stay in the book
+        buyer2.bids.create(price='1.00', quantity=1)
+        seller.asks.create(price='8.00', quantity=1)
+        # a statement of a player who has left the market is not part of the book
+        buyer1.refresh_from_db()
+        buyer1.bids.create(price='2.00', quantity=1)
+        buyer1.active = False
+        buyer1.save()
+
+    def test_stats(self):
+        stats, = self.subsession.get_market_stats()
+        self.assertEqual(stats['active_sellers'], 1)
+        self.assertEqual(stats['active_buyers'], 1)
+        self.assertEqual(stats['num_bids'], 1)
+        self.assertEqual(stats['num_asks'], 1)
+        self.assertEqual(stats['best_bid'], Decimal('1.00'))
+        self.assertEqual(stats['best_ask'], Decimal('8.00'))
+        self.assertEqual(stats['trades'], 1)
+        self.assertEqual(stats['volume'], 1)
+        self.assertEqual(stats['stored_statements_per_minute'], 5 * 60 / Constants.monitor_rate_window)
+
+    def test_data_endpoint_serializes_prices(self):
+        response = self.client.get('/double_auction/monitor/{}/data/'.format(self.session.code))
+        self.assertEqual(response.status_code, 200)
+        stats, = response.json()['groups']
+        self.assertEqual(Decimal(stats['best_bid']), Decimal('1.00'))
+        self.assertEqual(Decimal(stats['best_ask']), Decimal('8.00'))
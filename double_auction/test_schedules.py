@@ -0,0 +1,25 @@
+from django.test import TestCase
+from otree.session import create_session
+
+from .models import Constants, Subsession
+
+
+class ScheduleGenerationTest(TestCase):
+    def setUp(self):
+        session = create_session('double_auction', num_participants=6)
+        self.subsessions = Subsession.objects.filter(session=session).order_by('round_number')
+
+    def test_schedules_for_all_rounds(self):
+        self.assertEqual(len(self.subsessions), Constants.num_rounds)
+        for subsession in self.subsessions:
+            for p in subsession.get_players():
+                slots = p.get_slots()
+                if subsession.planned_role(p.participant) == 'seller':
+                    self.assertEqual(slots.count(), Constants.units_per_seller)
+                    self.assertEqual(p.get_full_slots().count(), Constants.units_per_seller)
+                    self.assertFalse(slots.filter(cost__isnull=True).exists())
+                else:
+                    self.assertEqual(slots.count(), Constants.units_per_buyer)
+                    self.assertFalse(p.get_full_slots().exists())
+                    self.assertFalse(slots.filter(value__isnull=True).exists())
+                    self.assertGreater(p.endowment, 0)
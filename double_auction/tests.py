@@ -1,4 +1,4 @@
-from otree.api import Currency as c, currency_range
+from otree.api import Currency as c, currency_range, Submission
 from . import pages
 from ._builtin import Bot
 from .models import Constants
@@ -7,5 +7,12 @@ from .models import Constants
 class PlayerBot(Bot):
 
     def play_round(self):
-        yield (pages.MyPage)
-        yield (pages.Results)
+        yield Submission(pages.Market, check_html=False)
+        # checked after the market page, once arrival-time grouping has happened: the groups formed in
+        # round 1 must keep roles matching the pregenerated schedules in every round
+        assert self.player.role() == self.subsession.planned_role(self.participant)
+        if self.player.role() == 'seller':
+            assert self.player.get_full_slots().count() == Constants.units_per_seller
+        else:
+            assert self.player.get_slots().count() == Constants.units_per_buyer
+            assert self.player.endowment > 0
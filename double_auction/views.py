@@ -0,0 +1,47 @@
+from django.views.generic import TemplateView, View
+from django.http import JsonResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.core.cache import cache
+from otree.models import Session
+
+from .models import Constants, Subsession
+
+
+class MonitorMixin:
+    # how long (in seconds) aggregated stats are reused between polls
+    cache_timeout = 1
+
+    def get_subsession(self):
+        session = get_object_or_404(Session, code=self.kwargs['session_code'])
+        try:
+            round_number = int(self.request.GET.get('round', 1))
+        except ValueError:
+            raise Http404('Invalid round number')
+        return get_object_or_404(Subsession, session=session, round_number=round_number)
+
+    def get_stats(self):
+        subsession = self.get_subsession()
+        key = 'double_auction_monitor_{}'.format(subsession.pk)
+        return cache.get_or_set(key, subsession.get_market_stats, self.cache_timeout)
+
+
+class SessionMonitor(MonitorMixin, TemplateView):
+    template_name = 'double_auction/monitor/SessionMonitor.html'
+    url_pattern = r'^double_auction/monitor/(?P<session_code>[a-z0-9]+)/$'
+    url_name = 'double_auction_monitor'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['subsession'] = self.get_subsession()
+        context['session_code'] = self.kwargs['session_code']
+        context['Constants'] = Constants
+        context['round_numbers'] = range(1, Constants.num_rounds + 1)
+        return context
+
+
+class SessionMonitorData(MonitorMixin, View):
+    url_pattern = r'^double_auction/monitor/(?P<session_code>[a-z0-9]+)/data/$'
+    url_name = 'double_auction_monitor_data'
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'groups': self.get_stats()})